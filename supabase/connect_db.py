@@ -1,10 +1,18 @@
 import os
+import asyncio
+import functools
+import itertools
 import json
 import logging
+import operator
+from datetime import datetime
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 
 try:
+    import httpx
     from supabase import create_client, Client
     from supabase.lib.client_options import ClientOptions
     from postgrest.exceptions import APIError
@@ -12,9 +20,46 @@ except ImportError:
     print("The 'supabase' library is not installed. Please install it with 'pip install supabase python-dotenv'")
     exit(1)
 
+try:
+    import h2  # noqa: F401 - only probed so httpx can negotiate HTTP/2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+try:
+    import orjson
+except ImportError:
+    # Optional C-speed JSON encoder; stdlib json is the fallback everywhere.
+    orjson = None
+
+try:
+    import asyncpg
+except ImportError:
+    # Only needed for the direct-Postgres COPY path (SUPABASE_DB_URL).
+    # The PostgREST upsert path works without it.
+    asyncpg = None
+
+try:
+    import ijson
+except ImportError:
+    print("The 'ijson' library is not installed. Please install it with 'pip install ijson'")
+    exit(1)
+
+try:
+    # Prefer the yajl2 C backend when available for C-speed parsing; the
+    # pure-Python backend is a drop-in fallback. Kept separate from the ijson
+    # package itself, which is still needed for ijson.JSONError - backend
+    # modules only expose the parsing entry points, not the exception types.
+    import ijson.backends.yajl2_c as ijson_backend
+except ImportError:
+    ijson_backend = ijson
+
 try:
     from dotenv import load_dotenv
-    load_dotenv() # Load environment variables from .env file if it exists
+    # Only pay for the .env file scan when the environment isn't already
+    # populated (e.g. under a process manager or CI that exports the vars).
+    if not os.getenv("NEXT_PUBLIC_SUPABASE_URL"):
+        load_dotenv(override=False) # Load environment variables from .env file if it exists
 except ImportError:
     print("The 'python-dotenv' library is not installed. Not critical if env vars are set otherwise. To install: 'pip install python-dotenv'")
 
@@ -22,16 +67,124 @@ except ImportError:
 # --- Configuration ---
 # Name of the table in Supabase
 CVE_TABLE_NAME = "cve_entries"
-# Path to the JSON data file relative to the project root
-# Assuming this script is in a 'supabase' subdirectory and data is in 'data' at the root
-# Adjust if your directory structure is different
-PROJECT_ROOT = Path(__file__).resolve().parent.parent
-JSON_DATA_PATH = PROJECT_ROOT / "data" / "nvdcve-1.1-2025.json"
+# Number of rows sent per upsert request. One HTTP round-trip per batch instead
+# of per row; tune via env if the default payload size is too large for your plan.
+BATCH_SIZE = int(os.getenv("CVE_UPSERT_BATCH_SIZE", "500"))
+# Number of batch upserts kept in flight concurrently. Each worker holds one
+# HTTP request open, hiding per-request round-trip latency behind the others.
+UPSERT_WORKERS = int(os.getenv("SUPABASE_UPSERT_WORKERS", "8"))
+# The pure-Python JSON->row transform is CPU-bound, so it is sharded across a
+# process pool; one worker per core by default, with this many items per task.
+TRANSFORM_WORKERS = int(os.getenv("CVE_TRANSFORM_WORKERS", str(os.cpu_count() or 1)))
+TRANSFORM_CHUNK_SIZE = int(os.getenv("CVE_TRANSFORM_CHUNK_SIZE", "2000"))
+# Whether to store the full original CVE item alongside the extracted fields.
+# Off by default: the raw item roughly doubles the JSONB bytes written and the
+# HTTP payload per row, and everything queried downstream is already extracted.
+STORE_RAW_CVE = os.getenv("STORE_RAW_CVE", "0") == "1"
+# When enabled, batches go through the upsert_cve_batch SQL function (see
+# supabase/upsert_cve_batch.sql, created once in the SQL editor) instead of
+# the PostgREST table endpoint. The batch travels as a single jsonb argument,
+# skipping PostgREST's per-row parsing and validation.
+UPSERT_VIA_RPC = os.getenv("SUPABASE_UPSERT_VIA_RPC", "0") == "1"
+UPSERT_RPC_NAME = "upsert_cve_batch"
+# Emit an INFO progress line roughly every this many processed items; the
+# per-chunk lines are DEBUG only.
+PROGRESS_LOG_INTERVAL = 5000
+# Rows are sorted by cve_id within each batch before being sent: sequential
+# btree inserts touch far fewer random index pages server-side than
+# feed-ordered ones, for negligible O(n log n) client cost.
+_BATCH_SORT_KEY = operator.itemgetter("cve_id")
+# Column order used for the direct-Postgres COPY path. Must match the row
+# dicts produced by extract_and_transform_cve_data and the cve_entries schema.
+CVE_COLUMNS = (
+    "cve_id",
+    "assigner",
+    "problem_type_data",
+    "references_data",
+    "description_text",
+    "description_data_full",
+    "configurations_data",
+    "impact_data",
+    "published_date",
+    "last_modified_date",
+    "raw_cve_item",
+)
+# --- Direct-Postgres connection endpoints ---
+# Two connection strings are recognised for the COPY bulk-load path:
+#   SUPABASE_POOLER_URL - Supavisor transaction pooler (...pooler.supabase.com:6543).
+#       Preferred for short-lived / concurrent loaders: avoids
+#       MaxClientsInSessionMode and connection exhaustion. Supavisor does not
+#       support protocol-level prepared statements, hence statement_cache_size=0
+#       on every asyncpg connection below; the COPY staging flow also runs as
+#       a single transaction so it stays pinned to one backend in this mode.
+#   SUPABASE_DB_URL - direct session connection (port 5432). Fine for a single
+#       long-running ingest when a dedicated connection slot is available.
+# If both are set, the pooler is used.
+DB_APPLICATION_NAME = "cve_loader"
+
+# JSONB columns whose values must be pre-serialized for binary COPY.
+_JSONB_COLUMNS = frozenset((
+    "problem_type_data",
+    "references_data",
+    "description_data_full",
+    "configurations_data",
+    "impact_data",
+    "raw_cve_item",
+))
+# Name of the JSON data file, expected in 'data' at the project root.
+# The full path is resolved lazily via default_json_data_path() so importing
+# this module doesn't touch the filesystem.
+JSON_DATA_FILENAME = "nvdcve-1.1-2025.json"
 
 # Setup basic logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# The HTTP stack logs a line per request, which adds up to real I/O across
+# thousands of batch upserts; keep library chatter to warnings and above.
+for _noisy_logger in ("httpx", "httpcore", "postgrest", "supabase"):
+    logging.getLogger(_noisy_logger).setLevel(logging.WARNING)
+
+def _dumps_json(obj: Any) -> str:
+    """
+    Serializes an object to a JSON string, preferring orjson when installed.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj)
+
+class _OrjsonHTTPClient(httpx.Client):
+    """
+    httpx.Client that encodes `json=` request bodies with orjson.
+
+    The deeply nested NVD records make stdlib json encoding a measurable
+    per-batch CPU cost; orjson cuts it several-fold. Only installed as the
+    PostgREST session when orjson is importable.
+    """
+    def request(self, method, url, *, json=None, **kwargs):  # noqa: A002 - httpx API
+        if json is not None:
+            kwargs["content"] = orjson.dumps(json)
+            headers = dict(kwargs.pop("headers", None) or {})
+            headers.setdefault("Content-Type", "application/json")
+            kwargs["headers"] = headers
+        return super().request(method, url, **kwargs)
+
+@functools.lru_cache(maxsize=1)
+def _project_root() -> Path:
+    """
+    Returns the project root directory (the parent of this script's directory).
+
+    Cached so repeated callers don't re-resolve symlinks on every lookup.
+    Adjust if your directory structure is different.
+    """
+    return Path(__file__).resolve().parent.parent
+
+def default_json_data_path() -> Path:
+    """
+    Returns the default path to the NVD JSON data file under <root>/data.
+    """
+    return _project_root() / "data" / JSON_DATA_FILENAME
+
 def get_env_variable(var_name: str) -> Optional[str]:
     """
     Safely retrieves an environment variable.
@@ -48,6 +201,7 @@ def get_env_variable(var_name: str) -> Optional[str]:
         logger.debug(f"Environment variable {var_name} not found.")
     return value
 
+@functools.lru_cache(maxsize=1)
 def init_supabase_client() -> Optional[Client]:
     """
     Initializes and returns a Supabase client.
@@ -56,25 +210,42 @@ def init_supabase_client() -> Optional[Client]:
     Prioritizes service role keys for necessary permissions.
     Exits if essential credentials are not found.
 
+    Memoized so repeated callers (e.g. a web handler importing this module)
+    share one client and its connection pool instead of paying a fresh TLS
+    handshake per call. Use close_supabase_client() to tear it down.
+
     Returns:
         A Supabase client instance or None if initialization fails.
     """
-    supabase_url = get_env_variable("NEXT_PUBLIC_SUPABASE_URL")
-    
+    # Snapshot the relevant keys in one pass instead of probing os.environ
+    # repeatedly (and again below for the anon-key warning).
+    env = {
+        k: os.environ.get(k)
+        for k in (
+            "NEXT_PUBLIC_SUPABASE_URL",
+            "SUPABASE_KEY",
+            "SUPABASE_SERVICE_ROLE_KEY",
+            "NEXT_PUBLIC_SUPABASE_SERIVCE_ROLE_KEY",
+            "NEXT_PUBLIC_SUPABASE_ANON_KEY",
+        )
+    }
+    supabase_url = env["NEXT_PUBLIC_SUPABASE_URL"]
+
     # Prioritize service role keys
-    supabase_key = (
-        get_env_variable("SUPABASE_KEY") or  # Common generic name, often service role
-        get_env_variable("SUPABASE_SERVICE_ROLE_KEY") or # Explicit service role key
-        get_env_variable("NEXT_PUBLIC_SUPABASE_SERIVCE_ROLE_KEY") # User provided service role key
+    service_role_key = (
+        env["SUPABASE_KEY"] or  # Common generic name, often service role
+        env["SUPABASE_SERVICE_ROLE_KEY"] or # Explicit service role key
+        env["NEXT_PUBLIC_SUPABASE_SERIVCE_ROLE_KEY"] # User provided service role key
     )
 
+    supabase_key = service_role_key
     if not supabase_key:
         logger.warning(
             "No explicit service role key (SUPABASE_KEY, SUPABASE_SERVICE_ROLE_KEY, NEXT_PUBLIC_SUPABASE_SERIVCE_ROLE_KEY) found. "
             "Attempting to use anon key (NEXT_PUBLIC_SUPABASE_ANON_KEY). "
             "This may not have sufficient permissions for schema modifications."
         )
-        supabase_key = get_env_variable("NEXT_PUBLIC_SUPABASE_ANON_KEY")
+        supabase_key = env["NEXT_PUBLIC_SUPABASE_ANON_KEY"]
 
     if not supabase_url or not supabase_key:
         logger.error(
@@ -95,26 +266,54 @@ def init_supabase_client() -> Optional[Client]:
 
     logger.info(f"Using Supabase URL: {supabase_url[:30]}...") # Increased preview length slightly
     logger.info(f"Using Supabase Key: {'********' + supabase_key[-4:] if len(supabase_key) > 4 else 'Key too short to mask'}")
-    if not (
-        os.getenv("SUPABASE_KEY") or 
-        os.getenv("SUPABASE_SERVICE_ROLE_KEY") or 
-        os.getenv("NEXT_PUBLIC_SUPABASE_SERIVCE_ROLE_KEY")
-    ) and os.getenv("NEXT_PUBLIC_SUPABASE_ANON_KEY"):
+    if not service_role_key:
         logger.warning("Proceeding with ANON key. Table creation and other administrative tasks may fail.")
 
 
     try:
         logger.info(f"Attempting to connect to Supabase at {supabase_url[:20]}...")
         # Explicitly set schema if needed, default is 'public'
-        # options = ClientOptions(schema="public")
-        # client: Client = create_client(supabase_url, supabase_key, options=options)
-        client: Client = create_client(supabase_url, supabase_key)
+        options = ClientOptions(postgrest_client_timeout=30, storage_client_timeout=30)
+        client: Client = create_client(supabase_url, supabase_key, options=options)
+
+        # Swap the default PostgREST session for a long-lived httpx client
+        # with a generous keep-alive pool (and HTTP/2 when h2 is installed),
+        # so concurrent batch upserts reuse warm connections instead of
+        # re-handshaking TLS.
+        session_cls = _OrjsonHTTPClient if orjson is not None else httpx.Client
+        default_session = client.postgrest.session
+        client.postgrest.session = session_cls(
+            base_url=default_session.base_url,
+            headers=default_session.headers,
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=40),
+            timeout=httpx.Timeout(30),
+        )
+        default_session.close()
+
         logger.info("Successfully initialized Supabase client.")
         return client
     except Exception as e:
         logger.error(f"Failed to initialize Supabase client: {e}")
         return None
 
+def close_supabase_client() -> None:
+    """
+    Closes the memoized Supabase client's connection pool, if one was created.
+
+    Also clears the init_supabase_client cache so a subsequent call builds a
+    fresh client (e.g. after credentials change).
+    """
+    cached = init_supabase_client.cache_info()
+    if cached.currsize:
+        client = init_supabase_client()
+        if client is not None:
+            try:
+                client.postgrest.session.close()
+            except Exception as e:
+                logger.warning(f"Error while closing Supabase client session: {e}")
+    init_supabase_client.cache_clear()
+
 def create_cve_table_if_not_exists(client: Client) -> bool:
     """
     Creates the CVE table in Supabase if it doesn't already exist.
@@ -175,34 +374,37 @@ def extract_and_transform_cve_data(cve_item: Dict[str, Any]) -> Optional[Dict[st
         A dictionary containing the structured data for the database, or None if essential
         data (like CVE ID) is missing.
     """
-    cve_data = cve_item.get("cve", {})
-    if not cve_data:
+    # This runs once per CVE in the hot path, so bind dict lookups to locals
+    # and avoid re-resolving attribute chains per field.
+    g = cve_item.get
+    if not (cve_data := g("cve")):
         logger.warning("CVE item missing 'cve' block. Skipping.")
         return None
 
-    cve_meta = cve_data.get("CVE_data_meta", {})
-    cve_id = cve_meta.get("ID")
-    if not cve_id:
-        logger.warning(f"CVE item missing 'ID' in CVE_data_meta. Raw item: {str(cve_item)[:200]}")
+    # %.200s defers the (expensive) str() of the item to the logging framework
+    # and only formats the first 200 chars, and only if the record is emitted.
+    if not (cve_meta := cve_data.get("CVE_data_meta")) or not (cve_id := cve_meta.get("ID")):
+        logger.warning("CVE item missing 'ID' in CVE_data_meta. Raw item: %.200s", cve_item)
         return None
 
     assigner = cve_meta.get("ASSIGNER")
 
-    problem_type_data = cve_data.get("problemtype", {}).get("problemtype_data")
-    references_data = cve_data.get("references", {}).get("reference_data")
-    description_data_full = cve_data.get("description", {}).get("description_data")
+    problem_type_data = (cve_data.get("problemtype") or {}).get("problemtype_data")
+    references_data = (cve_data.get("references") or {}).get("reference_data")
+    description_data_full = (cve_data.get("description") or {}).get("description_data")
+
+    description_text = next(
+        (
+            d.get("value")
+            for d in (description_data_full or ())
+            if isinstance(d, dict) and d.get("lang") == "en"
+        ),
+        None,
+    )
 
-    description_text = None
-    if description_data_full and isinstance(description_data_full, list):
-        for desc_entry in description_data_full:
-            if isinstance(desc_entry, dict) and desc_entry.get("lang") == "en":
-                description_text = desc_entry.get("value")
-                break
-    
-    # Ensure problem_type_data, references_data, description_data_full are stored as valid JSON
-    # by converting them to JSON strings if they are Python dicts/lists,
-    # though Supabase client often handles this. Explicit is safer for JSONB.
-    # However, Supabase client usually handles Python dicts/lists directly for JSONB.
+    # problem_type_data, references_data etc. are passed as Python objects;
+    # the Supabase client serializes them for the JSONB columns, and the COPY
+    # path serializes them explicitly in _row_to_record.
 
     return {
         "cve_id": cve_id,
@@ -211,12 +413,272 @@ def extract_and_transform_cve_data(cve_item: Dict[str, Any]) -> Optional[Dict[st
         "references_data": references_data,     # Directly pass the Python object
         "description_text": description_text,
         "description_data_full": description_data_full, # Directly pass the Python object
-        "configurations_data": cve_item.get("configurations"), # Directly pass the Python object
-        "impact_data": cve_item.get("impact"),               # Directly pass the Python object
+        "configurations_data": g("configurations"), # Directly pass the Python object
+        "impact_data": g("impact"),                 # Directly pass the Python object
+        "published_date": g("publishedDate"),
+        "last_modified_date": g("lastModifiedDate"),
+        # The whole original item as JSONB, only when explicitly requested.
+        "raw_cve_item": cve_item if STORE_RAW_CVE else None
+    }
+
+# The NVD feed shape is fixed, so a specialized extractor is generated at
+# import time that indexes the known structure directly instead of walking it
+# with defensive .get chains. STORE_RAW_CVE is baked in as a constant. Items
+# that don't match the expected shape raise and are retried through the safe
+# extract_and_transform_cve_data above.
+_EXTRACT_FAST_SOURCE = f'''
+def _extract_fast(cve_item):
+    c = cve_item["cve"]
+    m = c["CVE_data_meta"]
+    cve_id = m["ID"]
+    if not cve_id:
+        raise KeyError("ID")
+    desc = c["description"]["description_data"]
+    description_text = None
+    for d in desc:
+        if d["lang"] == "en":
+            description_text = d["value"]
+            break
+    return {{
+        "cve_id": cve_id,
+        "assigner": m.get("ASSIGNER"),
+        "problem_type_data": c["problemtype"]["problemtype_data"],
+        "references_data": c["references"]["reference_data"],
+        "description_text": description_text,
+        "description_data_full": desc,
+        "configurations_data": cve_item.get("configurations"),
+        "impact_data": cve_item.get("impact"),
         "published_date": cve_item.get("publishedDate"),
         "last_modified_date": cve_item.get("lastModifiedDate"),
-        "raw_cve_item": cve_item # Store the whole original item as JSONB
-    }
+        "raw_cve_item": {"cve_item" if STORE_RAW_CVE else "None"},
+    }}
+'''
+exec(compile(_EXTRACT_FAST_SOURCE, __file__, "exec"))
+
+def _extract_row(cve_item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Extracts a row via the generated fast path, falling back to the safe
+    extractor for items that don't match the expected NVD shape.
+    """
+    try:
+        return _extract_fast(cve_item)
+    except (KeyError, TypeError):
+        return extract_and_transform_cve_data(cve_item)
+
+def _chunked(iterable, size: int):
+    """
+    Yields lists of up to `size` items from `iterable` without consuming it eagerly.
+    """
+    chunk: List[Any] = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _transform_chunk(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Transforms a chunk of raw CVE items into row dicts, dropping failures.
+
+    Runs in a transform worker process; must stay module-level so it is picklable.
+    """
+    return [r for r in map(_extract_row, items) if r]
+
+def _dedup_rows(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Deduplicates rows by cve_id, keeping the newest last_modified_date.
+
+    Combined or re-modified feeds can repeat a cve_id; sending the same id
+    twice in one statement wastes bytes and makes Postgres reject the batch
+    with "ON CONFLICT DO UPDATE command cannot affect row a second time".
+    NVD timestamps are ISO-8601, so lexicographic comparison orders them.
+    """
+    seen: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        prev = seen.get(row["cve_id"])
+        if prev is None or (row.get("last_modified_date") or "") >= (prev.get("last_modified_date") or ""):
+            seen[row["cve_id"]] = row
+    if len(seen) != len(rows):
+        logger.debug("Dropped %d duplicate cve_id rows.", len(rows) - len(seen))
+    return list(seen.values())
+
+def upsert_cve_batch(client: Client, batch: List[Dict[str, Any]]) -> Tuple[int, int]:
+    """
+    Upserts a batch of transformed CVE rows in a single request.
+
+    With SUPABASE_UPSERT_VIA_RPC=1 the batch is sent as one jsonb payload to
+    the upsert_cve_batch SQL function; otherwise it goes to the PostgREST
+    table endpoint.
+
+    If the batch request fails (e.g. one malformed row poisons the whole batch),
+    falls back to upserting the rows one by one so only the bad rows are lost.
+
+    Args:
+        client: The initialized Supabase client.
+        batch: List of row dictionaries as produced by extract_and_transform_cve_data.
+
+    Returns:
+        A (succeeded, failed) tuple of row counts.
+    """
+    if not batch:
+        return 0, 0
+    batch = _dedup_rows(batch)
+    batch.sort(key=_BATCH_SORT_KEY)
+    try:
+        if UPSERT_VIA_RPC:
+            client.rpc(UPSERT_RPC_NAME, {"payload": batch}).execute()
+        else:
+            client.table(CVE_TABLE_NAME).upsert(batch, on_conflict="cve_id").execute()
+        return len(batch), 0
+    except APIError as e:
+        logger.error("Supabase APIError during batch upsert of %d rows: %s. Retrying rows individually.", len(batch), e.message)
+        if hasattr(e, 'details'): logger.error("Details: %s", e.details)
+    except Exception as e:
+        logger.error("Unexpected error during batch upsert of %d rows: %s. Retrying rows individually.", len(batch), e)
+
+    # Per-row fallback to isolate the offending row(s).
+    succeeded = 0
+    failed = 0
+    for row in batch:
+        try:
+            client.table(CVE_TABLE_NAME).upsert(row, on_conflict="cve_id").execute()
+            succeeded += 1
+        except APIError as e:
+            logger.error("Supabase APIError during upsert for CVE ID %s: %s", row.get('cve_id', 'N/A'), e.message)
+            failed += 1
+        except Exception as e:
+            logger.error("Unexpected error during upsert for CVE ID %s: %s", row.get('cve_id', 'N/A'), e)
+            failed += 1
+    return succeeded, failed
+
+def _parse_nvd_date(value: Optional[str]) -> Optional[datetime]:
+    """
+    Parses an NVD feed timestamp (e.g. '2025-05-21T20:15Z') into a datetime.
+
+    Binary COPY needs real datetime objects for timestamp columns; the
+    PostgREST path accepts the raw strings so this is only used for COPY.
+
+    Args:
+        value: The timestamp string from the feed, or None.
+
+    Returns:
+        A datetime instance, or None if the value is missing or unparseable.
+    """
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        logger.warning("Unparseable NVD date: %s", value)
+        return None
+
+def _row_to_record(row: Dict[str, Any]) -> tuple:
+    """
+    Converts a transformed row dict into a tuple in CVE_COLUMNS order for COPY,
+    serializing JSONB fields and parsing timestamps.
+    """
+    record = []
+    for col in CVE_COLUMNS:
+        value = row.get(col)
+        if col in _JSONB_COLUMNS:
+            record.append(_dumps_json(value) if value is not None else None)
+        elif col in ("published_date", "last_modified_date"):
+            record.append(_parse_nvd_date(value))
+        else:
+            record.append(value)
+    return tuple(record)
+
+async def bulk_load_cve_data(dsn: str, json_file_path: Path) -> None:
+    """
+    Bulk-loads the NVD feed over a direct Postgres connection using COPY.
+
+    COPY into a temp staging table plus a single INSERT ... ON CONFLICT merge
+    is the fastest Postgres ingest path, bypassing PostgREST's per-batch HTTP,
+    JSON validation and planning overhead entirely.
+
+    Args:
+        dsn: Postgres connection string for the Supabase database.
+        json_file_path: Path object for the JSON data file.
+    """
+    # Open directly rather than stat-ing first, with a 1 MiB buffer for the
+    # large sequential read.
+    try:
+        f = open(json_file_path, 'rb', buffering=1 << 20)
+    except FileNotFoundError:
+        logger.error(f"JSON data file not found at: {json_file_path}")
+        return
+
+    # statement_cache_size=0 keeps the connection safe behind poolers that
+    # don't support protocol-level prepared statements (see endpoint notes
+    # next to SUPABASE_POOLER_URL above).
+    try:
+        conn = await asyncpg.connect(
+            dsn,
+            statement_cache_size=0,
+            server_settings={"application_name": DB_APPLICATION_NAME},
+        )
+    except Exception:
+        f.close()
+        raise
+
+    try:
+        # The whole create/COPY/merge sequence runs in one transaction: under
+        # Supavisor's transaction pooling, separate autocommit statements can
+        # each land on a different backend, where the temp table from the
+        # first statement doesn't exist. ON COMMIT DROP also keeps cve_stage
+        # from leaking into other clients when the backend session is
+        # recycled into the pool.
+        async with conn.transaction():
+            await conn.execute(
+                f"CREATE TEMP TABLE cve_stage (LIKE {CVE_TABLE_NAME} INCLUDING DEFAULTS) ON COMMIT DROP"
+            )
+
+            # use_float avoids Decimal values, which JSON encoders reject.
+            cve_iter = ijson_backend.items(f, 'CVE_Items.item', use_float=True)
+
+            def next_chunk_records() -> Optional[List[tuple]]:
+                chunk = list(itertools.islice(cve_iter, TRANSFORM_CHUNK_SIZE))
+                if not chunk:
+                    return None
+                rows = _dedup_rows(_transform_chunk(chunk))
+                # Chunk-wise cve_id ordering for btree insert locality.
+                rows.sort(key=_BATCH_SORT_KEY)
+                return [_row_to_record(row) for row in rows]
+
+            async def records():
+                # The blocking read+parse of each chunk runs on a worker
+                # thread so it overlaps with COPY's network writes instead of
+                # stalling the event loop.
+                while (chunk_records := await asyncio.to_thread(next_chunk_records)) is not None:
+                    for record in chunk_records:
+                        yield record
+
+            result = await conn.copy_records_to_table(
+                'cve_stage', records=records(), columns=list(CVE_COLUMNS)
+            )
+            logger.info(f"COPY into staging table complete: {result}")
+
+            update_cols = [c for c in CVE_COLUMNS if c != "cve_id"]
+            set_clause = ", ".join(f"{c} = EXCLUDED.{c}" for c in update_cols)
+            col_list = ", ".join(CVE_COLUMNS)
+            # DISTINCT ON collapses cve_ids duplicated across chunks (newest
+            # last_modified_date wins), which would otherwise make the single
+            # ON CONFLICT statement reject the whole merge.
+            merged = await conn.execute(
+                f"INSERT INTO {CVE_TABLE_NAME} ({col_list}) "
+                f"SELECT DISTINCT ON (cve_id) {col_list} FROM cve_stage "
+                f"ORDER BY cve_id, last_modified_date DESC NULLS LAST "
+                f"ON CONFLICT (cve_id) DO UPDATE SET {set_clause}"
+            )
+            logger.info(f"Merge into {CVE_TABLE_NAME} complete: {merged}")
+    except ijson.JSONError as e:
+        logger.error(f"Error decoding JSON from {json_file_path}: {e}")
+        return
+    finally:
+        await conn.close()
+        f.close()
 
 def load_and_process_cve_data(client: Client, json_file_path: Path) -> None:
     """
@@ -227,69 +689,102 @@ def load_and_process_cve_data(client: Client, json_file_path: Path) -> None:
         client: The initialized Supabase client.
         json_file_path: Path object for the JSON data file.
     """
-    if not json_file_path.exists():
+    processed_count = 0
+    upserted_count = 0
+    failed_count = 0
+
+    # Accumulate rows and upsert in batches: one HTTP round-trip per BATCH_SIZE
+    # rows instead of per row, which dominates ingest time for this workload.
+    current_batch: List[Dict[str, Any]] = []
+
+    # Stream CVE items from the feed with ijson instead of json.load-ing the
+    # whole file: each item is parsed as it is consumed, so peak memory stays
+    # flat regardless of feed size and parsing overlaps with the upserts.
+    # The total count is unknown up front, so progress is logged by count only.
+    # Open directly rather than stat-ing first (one syscall instead of two),
+    # with a 1 MiB buffer for the large sequential read.
+    try:
+        f = open(json_file_path, 'rb', buffering=1 << 20)
+    except FileNotFoundError:
         logger.error(f"JSON data file not found at: {json_file_path}")
         return
+    except OSError as e:
+        logger.error(f"Error opening file {json_file_path}: {e}")
+        return
+
+    # Two-stage pipeline: chunks of raw items go to a process pool for the
+    # CPU-bound transform, and the resulting rows are batched onto a thread
+    # pool for the network upserts. Both in-flight queues are bounded so the
+    # streaming parser can't run arbitrarily far ahead of either stage.
+    upsert_pool = ThreadPoolExecutor(max_workers=UPSERT_WORKERS)
+    transform_pool = ProcessPoolExecutor(max_workers=TRANSFORM_WORKERS)
+    upserts_in_flight: deque = deque()
+    transforms_in_flight: deque = deque()
+
+    def drain_upserts(done) -> None:
+        nonlocal upserted_count, failed_count
+        for future in done:
+            succeeded, failed = future.result()
+            upserted_count += succeeded
+            failed_count += failed
+
+    def consume_rows(rows: List[Dict[str, Any]], chunk_len: int) -> None:
+        nonlocal processed_count, failed_count, current_batch
+        processed_count += chunk_len
+        failed_count += chunk_len - len(rows) # Failed to transform
+        current_batch.extend(rows)
+        while len(current_batch) >= BATCH_SIZE:
+            upserts_in_flight.append(
+                upsert_pool.submit(upsert_cve_batch, client, current_batch[:BATCH_SIZE])
+            )
+            current_batch = current_batch[BATCH_SIZE:]
+        if len(upserts_in_flight) > 2 * UPSERT_WORKERS:
+            done, pending = wait(upserts_in_flight, return_when=FIRST_COMPLETED)
+            upserts_in_flight.clear()
+            upserts_in_flight.extend(pending)
+            drain_upserts(done)
+        # Per-chunk lines stay at DEBUG; an INFO rollup fires whenever the
+        # count crosses a PROGRESS_LOG_INTERVAL boundary.
+        if processed_count // PROGRESS_LOG_INTERVAL != (processed_count - chunk_len) // PROGRESS_LOG_INTERVAL:
+            logger.info("Processed %d items. Upserted: %d, Failed: %d", processed_count, upserted_count, failed_count)
+        else:
+            logger.debug("Processed %d items. Upserted: %d, Failed: %d", processed_count, upserted_count, failed_count)
 
     try:
-        with open(json_file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-    except json.JSONDecodeError as e:
+        # use_float avoids Decimal values, which JSON encoders reject.
+        cve_iter = ijson_backend.items(f, 'CVE_Items.item', use_float=True)
+        for chunk in _chunked(cve_iter, TRANSFORM_CHUNK_SIZE):
+            transforms_in_flight.append(
+                (transform_pool.submit(_transform_chunk, chunk), len(chunk))
+            )
+            while len(transforms_in_flight) > 2 * TRANSFORM_WORKERS:
+                future, chunk_len = transforms_in_flight.popleft()
+                consume_rows(future.result(), chunk_len)
+
+        while transforms_in_flight:
+            future, chunk_len = transforms_in_flight.popleft()
+            consume_rows(future.result(), chunk_len)
+
+        # Submit the final partial batch.
+        upserts_in_flight.append(upsert_pool.submit(upsert_cve_batch, client, current_batch))
+    except ijson.JSONError as e:
         logger.error(f"Error decoding JSON from {json_file_path}: {e}")
         return
-    except Exception as e:
+    except OSError as e:
         logger.error(f"Error reading file {json_file_path}: {e}")
         return
-
-    cve_items: List[Dict[str, Any]] = data.get("CVE_Items", [])
-    if not cve_items:
+    finally:
+        # Drain all outstanding batches before reporting totals.
+        transform_pool.shutdown(wait=True)
+        drain_upserts(upserts_in_flight)
+        upsert_pool.shutdown(wait=True)
+        f.close()
+
+    if processed_count == 0:
         logger.warning("No 'CVE_Items' found in the JSON data.")
         return
 
-    total_items = len(cve_items)
-    logger.info(f"Found {total_items} CVE items to process.")
 
-    processed_count = 0
-    upserted_count = 0
-    failed_count = 0
-    
-    # Batching for upsert might be more performant for very large datasets
-    # For now, upserting one by one for simplicity.
-    # batch_size = 100 
-    # current_batch = []
-
-    for i, item in enumerate(cve_items):
-        transformed_data = extract_and_transform_cve_data(item)
-        if transformed_data:
-            try:
-                # Upsert logic: Inserts if cve_id doesn't exist, updates if it does.
-                response = client.table(CVE_TABLE_NAME).upsert(
-                    transformed_data, 
-                    on_conflict="cve_id" # Specify the column for conflict resolution
-                ).execute()
-                
-                # Supabase upsert response usually contains data if successful.
-                # Check for errors in response if APIError is not raised.
-                if hasattr(response, 'error') and response.error:
-                    logger.error(f"Failed to upsert CVE ID {transformed_data['cve_id']}. Error: {response.error}")
-                    failed_count +=1
-                else:
-                    upserted_count += 1
-                
-                if (i + 1) % 100 == 0 or (i + 1) == total_items: # Log progress every 100 items
-                    logger.info(f"Processed {i+1}/{total_items} items. Upserted: {upserted_count}, Failed: {failed_count}")
-
-            except APIError as e:
-                logger.error(f"Supabase APIError during upsert for CVE ID {transformed_data.get('cve_id', 'N/A')}: {e.message}")
-                if hasattr(e, 'details'): logger.error(f"Details: {e.details}")
-                failed_count +=1
-            except Exception as e:
-                logger.error(f"Unexpected error during upsert for CVE ID {transformed_data.get('cve_id', 'N/A')}: {e}")
-                failed_count +=1
-        else:
-            failed_count +=1 # Failed to transform
-        processed_count +=1
-            
     logger.info(f"--- Processing Complete ---")
     logger.info(f"Total items read: {processed_count}")
     logger.info(f"Successfully upserted: {upserted_count}")
@@ -302,18 +797,40 @@ def main():
     Initializes Supabase client, creates table, and processes data.
     """
     logger.info("Starting CVE data import process...")
-    
+
+    json_data_path = default_json_data_path()
+
+    # Prefer the direct-Postgres COPY path when a connection string is
+    # provided; it is an order of magnitude faster than upserting over
+    # PostgREST for a full-feed ingest. The transaction pooler (6543) wins
+    # over the session endpoint (5432) when both are configured.
+    db_url = get_env_variable("SUPABASE_POOLER_URL") or get_env_variable("SUPABASE_DB_URL")
+    if db_url:
+        if asyncpg is None:
+            logger.error(
+                "A Postgres connection string is set but 'asyncpg' is not installed. "
+                "Install it with 'pip install asyncpg' or unset SUPABASE_POOLER_URL/"
+                "SUPABASE_DB_URL to use the PostgREST upsert path."
+            )
+            return
+        asyncio.run(bulk_load_cve_data(db_url, json_data_path))
+        logger.info("CVE data import process finished.")
+        return
+
     supabase_client = init_supabase_client()
     if not supabase_client:
         logger.error("Exiting due to Supabase client initialization failure.")
         return
 
-    if not create_cve_table_if_not_exists(supabase_client):
-        logger.error("Exiting due to table creation failure.")
-        return
+    try:
+        if not create_cve_table_if_not_exists(supabase_client):
+            logger.error("Exiting due to table creation failure.")
+            return
+
+        load_and_process_cve_data(supabase_client, json_data_path)
+    finally:
+        close_supabase_client()
 
-    load_and_process_cve_data(supabase_client, JSON_DATA_PATH)
-    
     logger.info("CVE data import process finished.")
 
 if __name__ == "__main__":
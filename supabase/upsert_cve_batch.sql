@@ -0,0 +1,68 @@
+-- Batch upsert function for cve_entries, called from connect_db.py via
+-- client.rpc("upsert_cve_batch", {"payload": batch}) when
+-- SUPABASE_UPSERT_VIA_RPC=1.
+--
+-- Run this once in the Supabase SQL editor (like the rich_cve_entries view,
+-- it is managed manually rather than from the loader script). The whole batch
+-- arrives as one jsonb array, so PostgREST parses a single argument instead of
+-- re-validating every row, and Postgres unpacks it with jsonb_to_recordset.
+-- Column types must match the cve_entries schema.
+
+create or replace function upsert_cve_batch(payload jsonb)
+returns integer
+language sql
+as $$
+  with ins as (
+    insert into cve_entries (
+      cve_id,
+      assigner,
+      problem_type_data,
+      references_data,
+      description_text,
+      description_data_full,
+      configurations_data,
+      impact_data,
+      published_date,
+      last_modified_date,
+      raw_cve_item
+    )
+    select
+      r.cve_id,
+      r.assigner,
+      r.problem_type_data,
+      r.references_data,
+      r.description_text,
+      r.description_data_full,
+      r.configurations_data,
+      r.impact_data,
+      r.published_date,
+      r.last_modified_date,
+      r.raw_cve_item
+    from jsonb_to_recordset(payload) as r(
+      cve_id text,
+      assigner text,
+      problem_type_data jsonb,
+      references_data jsonb,
+      description_text text,
+      description_data_full jsonb,
+      configurations_data jsonb,
+      impact_data jsonb,
+      published_date timestamptz,
+      last_modified_date timestamptz,
+      raw_cve_item jsonb
+    )
+    on conflict (cve_id) do update set
+      assigner = excluded.assigner,
+      problem_type_data = excluded.problem_type_data,
+      references_data = excluded.references_data,
+      description_text = excluded.description_text,
+      description_data_full = excluded.description_data_full,
+      configurations_data = excluded.configurations_data,
+      impact_data = excluded.impact_data,
+      published_date = excluded.published_date,
+      last_modified_date = excluded.last_modified_date,
+      raw_cve_item = excluded.raw_cve_item
+    returning 1
+  )
+  select count(*)::integer from ins;
+$$;